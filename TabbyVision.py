@@ -1,13 +1,41 @@
 #!/usr/bin/env python3
 import csv
+import os
+import re
 import sys
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import xlrd
+import xlsxwriter
+from openpyxl import load_workbook
 from prettytable import PrettyTable
 import argparse
 
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
 __version__ = "1.0"
 __author__ = "Kacper Dudczak"
 
+# cell values treated as missing data
+_MISSING = frozenset(("", "None", "NaN", None))
+
+# matches a whole cell holding an optionally signed integer or decimal number
+_is_number = re.compile(r"-?(?:\d+\.?\d*|\.\d+)").fullmatch
+
+# matches numbers written with a leading zero, such as ZIP codes ("00501"),
+# which must stay text to keep their digits
+_has_leading_zero = re.compile(r"-?0\d").match
+
+# supported file extensions and the file type each one maps to
+_FILE_TYPES = {".csv": "csv", ".tsv": "tsv", ".xls": "xls", ".xlsx": "xlsx"}
+
+# buffer size for text output, so large exports need fewer write() calls
+_WRITE_BUFFER_SIZE = 1 << 20
+
 
 def get_file_type(filename):
     """
@@ -28,73 +56,126 @@ def get_file_type(filename):
     None
     """
 
-    if filename.endswith(".csv"):
-        return "csv"
-    elif filename.endswith(".tsv"):
-        return "tsv"
-    elif filename.endswith(".xls"):
-        return "xls"
-    elif filename.endswith(".xlsx"):
-        return "xlsx"
-    else:
-        return None
+    return _FILE_TYPES.get(os.path.splitext(filename)[1].lower())
+
+
+def _cell_to_str(value):
+    """
+    Convert a spreadsheet cell value to the string form used for CSV/TSV data.
 
+    Parameters:
+    value: The raw cell value returned by the spreadsheet reader.
 
-def read_table_from_file_as_list_of_dicts(filename):
+    Returns:
+    str: An empty string for empty cells, otherwise the value as a string.
     """
-    Reads a table from a file and returns it as a list of dictionaries.
+    if value is None:
+        return ""
+    return str(value)
+
+
+def _spreadsheet_header(header):
+    """
+    Convert a spreadsheet header row to column names.
+
+    Parameters:
+    header (sequence): The raw cell values of the header row.
+
+    Returns:
+    list of str: The header cells as strings, with blank cells named after
+                 their position (e.g. "Column 2") so they stay separate columns.
+                 Blank cells after the last named one are dropped.
+    """
+    names = [_cell_to_str(name) for name in header]
+    # the sheet's used range can extend past the data, e.g. because of a styled cell
+    while names and not names[-1]:
+        names.pop()
+    return [name or f"Column {index}" for index, name in enumerate(names, 1)]
+
+
+def read_table_as_columns(filename, fast_io=False):
+    """
+    Reads a table from a file and returns it as a dictionary of columns.
 
     The file type is determined by the file's extension. Currently, the function
     supports CSV, TSV, XLS, and XLSX files.
 
     Parameters:
     filename (str): The name of the file to read from.
+    fast_io (bool): Parse CSV and TSV files with polars instead of the csv
+                    module. Requires polars to be installed. Repeated column
+                    names are kept as separate "<name>_duplicated_<n>" columns.
 
     Returns:
-    list of dict: A list of dictionaries, where each dictionary represents a row
-                  in the table and the keys are the column names.
+    dict of lists: A dictionary where each key is a column name and each value
+                   is the list of values in that column, in row order.
 
     Raises:
     SystemExit: If the file's extension is not recognized.
 
     Examples:
-    >>> read_table_from_file_as_list_of_dicts("data.csv")
-    [{'name': 'Alice', 'age': '25', 'city': 'New York'},     {'name': 'Bob', 'age': '30', 'city': 'Los Angeles'}]
-    >>> read_table_from_file_as_list_of_dicts("data.xlsx")
-    [{'name': 'Alice', 'age': '25', 'city': 'New York'},     {'name': 'Bob', 'age': '30', 'city': 'Los Angeles'}]
+    >>> read_table_as_columns("data.csv")
+    {'name': ['Alice', 'Bob'], 'age': ['25', '30'], 'city': ['New York', 'Los Angeles']}
+    >>> read_table_as_columns("data.xlsx")
+    {'name': ['Alice', 'Bob'], 'age': ['25', '30'], 'city': ['New York', 'Los Angeles']}
     """
 
     file_type = get_file_type(filename)
-    if file_type == "csv":
-        with open(filename, 'r') as f:
-            reader = csv.DictReader(f)
-            data = []
-            for row in reader:
-                data.append(row)
-    elif file_type == "tsv":
+    if fast_io and (file_type == "csv" or file_type == "tsv"):
+        separator = '\t' if file_type == "tsv" else ','
+        # infer_schema_length=0 keeps every column as strings, like the csv module;
+        # extra fields are cut off and blank lines (all-null rows) are skipped
+        df = pl.read_csv(filename, separator=separator, infer_schema_length=0, truncate_ragged_lines=True)
+        df = df.filter(~pl.all_horizontal(pl.all().is_null()))
+        data = df.fill_null("").to_dict(as_series=False)
+    elif file_type == "csv" or file_type == "tsv":
+        delimiter = '\t' if file_type == "tsv" else ','
         with open(filename, 'r') as f:
-            reader = csv.DictReader(f, delimiter='\t')
-            data = []
+            # csv.reader with per-column lists avoids building a dict for every row
+            reader = csv.reader(f, delimiter=delimiter)
+            header = next(reader, [])
+            columns = [[] for _ in header]
+            data = dict(zip(header, columns))
+            width = len(columns)
             for row in reader:
-                data.append(row)
+                if not row:
+                    continue
+                if len(row) < width:
+                    row += [""] * (width - len(row))
+                for values, value in zip(columns, row):
+                    values.append(value)
     elif file_type == "xls":
         workbook = xlrd.open_workbook(filename)
         worksheet = workbook.sheet_by_index(0)
-        data = []
+        header = _spreadsheet_header(worksheet.row_values(0))
+        # one list per header position, so a repeated name keeps the last column
+        # (as csv.DictReader did) instead of two names sharing one list
+        columns = [[] for _ in header]
+        data = dict(zip(header, columns))
         for row in range(1, worksheet.nrows):
-            data.append({
-                worksheet.row_values(0)[i]: worksheet.row_values(row)[i]
-                for i in range(worksheet.ncols)
-            })
+            for values, value in zip(columns, worksheet.row_values(row)):
+                values.append(_cell_to_str(value))
     elif file_type == "xlsx":
-        workbook = xlrd.open_workbook(filename)
-        worksheet = workbook.sheet_by_index(0)
-        data = []
-        for row in range(1, worksheet.nrows):
-            data.append({
-                worksheet.row_values(0)[i]: worksheet.row_values(row)[i]
-                for i in range(worksheet.ncols)
-            })
+        # xlrd >= 2.0 only reads legacy .xls files, so .xlsx goes through openpyxl;
+        # read-only mode streams rows from the file instead of loading every cell
+        workbook = load_workbook(filename, read_only=True, data_only=True)
+        try:
+            worksheet = workbook.worksheets[0]
+            rows = worksheet.iter_rows(values_only=True)
+            header = _spreadsheet_header(next(rows, ()))
+            columns = [[] for _ in header]
+            data = dict(zip(header, columns))
+            width = len(columns)
+            for row in rows:
+                row = row[:width]
+                if all(value is None for value in row):
+                    continue
+                if len(row) < width:
+                    row += (None,) * (width - len(row))
+                for values, value in zip(columns, row):
+                    values.append(_cell_to_str(value))
+        finally:
+            workbook.close()
     else:
         print("File type not recognized")
         sys.exit(1)
@@ -107,15 +188,15 @@ def display_table_dimensions(data):
     Display the dimensions of a table as a PrettyTable.
 
     Parameters:
-    data (list of dict): A list of dictionaries representing the table, where
-                         each dictionary represents a row in the table and the
-                         keys are the column names.
+    data (dict of lists): A dictionary representing the table, where each key
+                          is a column name and each value is the list of values
+                          in that column.
 
     Returns:
     None.
 
     Examples:
-    >>> data = [            {'name': 'Alice', 'age': 25, 'city': 'New York'},            {'name': 'Bob', 'age': 30, 'city': 'Los Angeles'}        ]
+    >>> data = {'name': ['Alice', 'Bob'], 'age': [25, 30], 'city': ['New York', 'Los Angeles']}
     >>> display_table_dimensions(data)
     +----------------------------+----------------+------------------+
     | Number of rows with Header | Number of rows | Number of columns|
@@ -123,9 +204,10 @@ def display_table_dimensions(data):
     |             2              |        1       |         3        |
     +----------------------------+----------------+------------------+
     """
+    rows = len(next(iter(data.values()), []))
     table = PrettyTable()
     table.field_names = ["Number of rows with Header", "Number of rows", "Number of columns"]
-    table.add_row([len(data), len(data) - 1, len(data[0].keys())])
+    table.add_row([rows, rows - 1, len(data)])
     print(table)
 
 def display_columns_and_types(data):
@@ -133,15 +215,15 @@ def display_columns_and_types(data):
     Display the names and types of the columns in a table as a PrettyTable.
 
     Parameters:
-    data (list of dict): A list of dictionaries representing the table, where
-                         each dictionary represents a row in the table and the
-                         keys are the column names.
+    data (dict of lists): A dictionary representing the table, where each key
+                          is a column name and each value is the list of values
+                          in that column.
 
     Returns:
     None.
 
     Examples:
-    >>> data = [            {'name': 'Alice', 'age': 25, 'city': 'New York'},            {'name': 'Bob', 'age': 30, 'city': 'Los Angeles'}        ]
+    >>> data = {'name': ['Alice', 'Bob'], 'age': ['25', '30'], 'city': ['New York', 'Los Angeles']}
     >>> display_columns_and_types(data)
     +------------+----------------+
     | Column name|   Column type   |
@@ -152,10 +234,9 @@ def display_columns_and_types(data):
     +------------+----------------+
 
     """
-    columns = data[0].keys()
     table = PrettyTable()
     table.field_names = ["Column name", "Column type"]
-    for column in columns:
+    for column in data:
         column_type = check_column_type(data, column)
         table.add_row([column, column_type])
     print(table)
@@ -166,9 +247,9 @@ def check_column_type(data, column_to_check):
     Determine whether a column in a table contains numeric or non-numeric data.
 
     Parameters:
-    data (list of dict): A list of dictionaries representing the table, where
-                         each dictionary represents a row in the table and the
-                         keys are the column names.
+    data (dict of lists): A dictionary representing the table, where each key
+                          is a column name and each value is the list of values
+                          in that column.
     column_to_check (str): The name of the column to check.
 
     Returns:
@@ -177,7 +258,7 @@ def check_column_type(data, column_to_check):
          numeric.
 
     Examples:
-    >>> data = [            {'name': 'Alice', 'age': '25', 'city': 'New York'},            {'name': 'Bob', 'age': '30', 'city': 'Los Angeles'}        ]
+    >>> data = {'name': ['Alice', 'Bob'], 'age': ['25', '30'], 'city': ['New York', 'Los Angeles']}
     >>> check_column_type(data, 'name')
     'not_numeric'
     >>> check_column_type(data, 'age')
@@ -186,11 +267,11 @@ def check_column_type(data, column_to_check):
     'not_numeric'
 
     """
-    column_data = [row[column_to_check] for row in data if row[column_to_check] != "" and row[column_to_check] != "None" and row[column_to_check] != "NaN"]
-    if all(value.replace('.', '', 1).isdigit() or value.isnumeric() or value.isdecimal() for value in column_data):
-        return "numeric"
-    else:
-        return "not_numeric"
+    # missing values are skipped in the same pass instead of being filtered out first
+    for value in data[column_to_check]:
+        if value not in _MISSING and not _is_number(value):
+            return "not_numeric"
+    return "numeric"
 
 
 def change_values_in_table(data, column_to_change, old_value, new_value):
@@ -198,109 +279,128 @@ def change_values_in_table(data, column_to_change, old_value, new_value):
     Modify the values of a specific column in a table.
 
     Parameters:
-    data (list of dicts):   The table to modify.
+    data (dict of lists):   The table to modify.
                             column_to_change (str): The name of the column to modify. If set to "all", every value in every column will be checked for replacement.
     old_value (str): The value to be replaced.
     new_value (str): The new value to be assigned to the old value.
 
     Returns:
-    list of dicts: The modified table with updated values.
+    dict of lists: The modified table with updated values.
 
     Examples:
-    >>> data = [{'Name': 'John', 'Age': '30', 'Money': '30'}, {'Name': 'Mary', 'Age': '-', 'Money': '-'}]
+    >>> data = {'Name': ['John', 'Mary'], 'Age': ['30', '-'], 'Money': ['30', '-']}
     >>> change_values_in_table(data, 'Age', '-', 'NaN')
-    [{'Name': 'John', 'Age': '31', 'Money': '30'}, {'Name': 'Mary', 'Age': 'NaN', 'Money': '-'}]
+    {'Name': ['John', 'Mary'], 'Age': ['30', 'NaN'], 'Money': ['30', '-']}
     >>> change_values_in_table(data, 'all', '30', '0')
-    [{'Name': 'John', 'Age': '0', 'Money': '0'}, {'Name': 'Mary', 'Age': '-', 'Money': '-}]
+    {'Name': ['John', 'Mary'], 'Age': ['0', 'NaN'], 'Money': ['0', '-']}
     """
-    if column_to_change == "all":
-        for row in data:
-            for key in row.keys():
-                if row[key] == old_value:
-                    row[key] = new_value
-    else:
-        for row in data:
-            if row[column_to_change] == old_value:
-                row[column_to_change] = new_value
+    columns = list(data) if column_to_change == "all" else [column_to_change]
+    for column in columns:
+        data[column] = [new_value if value == old_value else value for value in data[column]]
     return data
 
 
+def _column_fill_value(values):
+    """
+    Compute the value used to fill the missing cells of a single column.
+
+    Parameters:
+    values (list): The values of the column.
+
+    Returns:
+    str or None: The mean of the column if all its present values are numeric,
+                 otherwise its most common value. None if every value is missing.
+    """
+    column_data = [value for value in values if value not in _MISSING]
+    if not column_data:
+        return None
+    if all(_is_number(value) for value in column_data):
+        mean = np.asarray(column_data, dtype=np.float64).mean()
+        return str(float(mean))
+    return Counter(column_data).most_common(1)[0][0]
+
+
 def replace_nan_with_mean(data):
     """
     Replace missing values in a table with the mean of the column.
 
     Parameters:
-    data (list of dicts): The table to modify.
+    data (dict of lists): The table to modify.
 
     Returns:
-    list of dicts: The modified table with updated values.
+    dict of lists: The modified table with updated values.
 
     Raises:
     ValueError: If the column contains non-numeric values.
     
     Example:
-    >>> data = [{'Name': 'John', 'Age': '30', 'Money': '30'}, {'Name': 'Mary', 'Age': 'NaN', 'Money': 'NaN'}]
+    >>> data = {'Name': ['John', 'Mary'], 'Age': ['30', 'NaN'], 'Money': ['30', 'NaN']}
     >>> replace_nan_with_mean(data)
-    [{'Name': 'John', 'Age': '30', 'Money': '30'}, {'Name': 'Mary', 'Age': '30', 'Money': '30'}]
+    {'Name': ['John', 'Mary'], 'Age': ['30', '30.0'], 'Money': ['30', '30.0']}
     """
-    columns = data[0].keys()
-    for key in columns:
-        column_data = [row[key] for row in data if row[key] != "" and row[key] is not None and row[key] != "NaN"]
-        if all(value.isdigit() for value in column_data):
-            column_data = [int(value) for value in column_data]
-            mean = sum(column_data) / len(column_data)
-            for row in data:
-                if row[key] == "" or row[key] == "None" or row[key] == "NaN":
-                    row[key] = str(mean)
-        else:
-            most_common_value = max(set(column_data), key=column_data.count)
-            for row in data:
-                if row[key] == "" or row[key] == "None" or row[key] == "NaN":
-                    row[key] = most_common_value
+    # columns are independent, so their fill values are computed concurrently
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        fill_values = list(executor.map(_column_fill_value, data.values()))
+    for (key, values), fill_value in zip(data.items(), fill_values):
+        if fill_value is None:
+            continue
+        data[key] = [fill_value if value in _MISSING else value for value in values]
     return data
 
 
 
-def save_list_of_dicts_to_file(data, filename):
+def save_columns_to_file(data, filename, fast_io=False):
     """
-    Save a list of dictionaries to a file.
+    Save a dictionary of columns to a file.
 
     Parameters:
-    data (list of dicts): The data to save.
+    data (dict of lists): The data to save.
     filename (str): The name of the file to save the data to.
+    fast_io (bool): Write CSV and TSV files with polars instead of the csv
+                    module. Requires polars to be installed.
 
     Returns:
     None
 
     Examples:
-    >>> data = [{'Name': 'John', 'Age': '30', 'Money': '30'}, {'Name': 'Mary', 'Age': '31', 'Money': '0'}]
-    >>> save_list_of_dicts_to_file(data, 'test.csv')
-    >>> save_list_of_dicts_to_file(data, 'test.tsv')
-    >>> save_list_of_dicts_to_file(data, 'test.xls')
+    >>> data = {'Name': ['John', 'Mary'], 'Age': ['30', '31'], 'Money': ['30', '0']}
+    >>> save_columns_to_file(data, 'test.csv')
+    >>> save_columns_to_file(data, 'test.tsv')
+    >>> save_columns_to_file(data, 'test.xlsx')
     """
     file_type = get_file_type(filename)
-    if file_type == "csv":
-        with open(filename, 'w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=data[0].keys())
-            writer.writeheader()
-            writer.writerows(data)
-    elif file_type == "tsv":
-        with open(filename, 'w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=data[0].keys(), delimiter='\t')
-            writer.writeheader()
-            writer.writerows(data)
+    if fast_io and (file_type == "csv" or file_type == "tsv"):
+        separator = '\t' if file_type == "tsv" else ','
+        # match csv.writer output: unquoted empty cells and \r\n row endings; the
+        # explicit schema keeps columns of a table without rows typed as strings
+        df = pl.DataFrame(data, schema={key: pl.String for key in data})
+        df = df.select(pl.all().replace("", None))
+        df.write_csv(filename, separator=separator, line_terminator="\r\n")
+    elif file_type == "csv" or file_type == "tsv":
+        delimiter = '\t' if file_type == "tsv" else ','
+        with open(filename, 'w', newline='', buffering=_WRITE_BUFFER_SIZE) as f:
+            # rows are zipped straight from the columns, with no dict per row
+            writer = csv.writer(f, delimiter=delimiter)
+            writer.writerow(data.keys())
+            writer.writerows(zip(*data.values()))
     elif file_type == "xls":
-        workbook = xlrd.open_workbook(filename)
-        worksheet = workbook.sheet_by_index(0)
-        for row in range(1, worksheet.nrows):
-            for i in range(worksheet.ncols):
-                worksheet.write(row, i, data[row-1][worksheet.row_values(0)[i]])
+        # xlrd can only read workbooks and xlsxwriter cannot write the legacy format
+        print("Saving to XLS is not supported, use XLSX instead")
+        sys.exit(1)
     elif file_type == "xlsx":
-        workbook = xlrd.open_workbook(filename)
-        worksheet = workbook.sheet_by_index(0)
-        for row in range(1, worksheet.nrows):
-            for i in range(worksheet.ncols):
-                worksheet.write(row, i, data[row-1][worksheet.row_values(0)[i]])
+        # constant_memory flushes each row to disk once the next one is started
+        workbook = xlsxwriter.Workbook(filename, {'constant_memory': True, 'use_zip64': True})
+        worksheet = workbook.add_worksheet()
+        header = list(data)
+        worksheet.write_row(0, 0, header)
+        for row_number, row in enumerate(zip(*(data[key] for key in header)), 1):
+            for column_number, value in enumerate(row):
+                # store as numbers exactly the values check_column_type treats as numeric
+                if _is_number(value) and not _has_leading_zero(value):
+                    worksheet.write_number(row_number, column_number, float(value))
+                else:
+                    worksheet.write_string(row_number, column_number, value)
+        workbook.close()
     else:
         print("File type not recognized")
         sys.exit(1)
@@ -311,13 +411,13 @@ def display_table_as_pretty_table(data):
     Display a table as a pretty table.
 
     Parameters:
-    data (list of dicts): The table to display.
+    data (dict of lists): The table to display.
 
     Returns:
     None
 
     Examples:
-    >>> data = [{'Name': 'John', 'Age': '30', 'Money': '30'}, {'Name': 'Mary', 'Age': '31', 'Money': '0'}]
+    >>> data = {'Name': ['John', 'Mary'], 'Age': ['30', '31'], 'Money': ['30', '0']}
     >>> display_table_as_pretty_table(data)
     +------+-----+-------+
     | Name | Age | Money |
@@ -326,9 +426,9 @@ def display_table_as_pretty_table(data):
     | Mary |  31 |     0 |
     +------+-----+-------+
     """
-    table = PrettyTable(data[0].keys())
-    for row in data:
-        table.add_row(row.values())
+    table = PrettyTable(list(data))
+    # rows are only rebuilt from the columns here, at print time
+    table.add_rows(list(zip(*data.values())))
     print(table)
 
 
@@ -358,13 +458,17 @@ def parse_args():
     parser.add_argument("-n", "--nan", action="store_true", help="replace NaN or empty places with mean value")
     parser.add_argument("-d", "--dimensions", action="store_true", help="display table dimensions")
     parser.add_argument("-l", "--list-columns", action="store_true", help="display list of columns in the table")
+    parser.add_argument("--fast-io", action="store_true", help="read and write CSV/TSV files with polars (repeated column names are kept as NAME_duplicated_N)")
 
     args = parser.parse_args()
     return args
 
 if __name__ == '__main__':
     args = parse_args()
-    data = read_table_from_file_as_list_of_dicts(args.filename)
+    if args.fast_io and pl is None:
+        print("--fast-io requires polars (pip install polars)")
+        sys.exit(1)
+    data = read_table_as_columns(args.filename, args.fast_io)
 
 
 
@@ -377,7 +481,7 @@ if __name__ == '__main__':
     if args.list_columns:
         display_columns_and_types(data)
     if args.output:
-        save_list_of_dicts_to_file(data, args.output)
+        save_columns_to_file(data, args.output, args.fast_io)
 
     display_table_as_pretty_table(data)
 